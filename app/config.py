@@ -2,39 +2,46 @@
 import os
 from typing import Optional
 from pydantic import Field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """应用配置类"""
 
     # Twitter账号配置
-    twitter_username: str = Field(..., env="TWITTER_USERNAME", description="Twitter用户名")
-    twitter_email: str = Field(..., env="TWITTER_EMAIL", description="Twitter邮箱")
-    twitter_password: str = Field(..., env="TWITTER_PASSWORD", description="Twitter密码")
+    twitter_username: str = Field(..., description="Twitter用户名")
+    twitter_email: str = Field(..., description="Twitter邮箱")
+    twitter_password: str = Field(..., description="Twitter密码")
 
     # 服务配置
-    host: str = Field("0.0.0.0", env="HOST", description="服务主机地址")
-    port: int = Field(8000, env="PORT", description="服务端口")
+    host: str = Field("0.0.0.0", description="服务主机地址")
+    port: int = Field(8000, description="服务端口")
+    workers: int = Field(1, ge=1, description="uvicorn工作进程数(大于1时需显式配置)")
 
     # 数据库配置
-    database_url: str = Field("sqlite+aiosqlite:///data/app.db", env="DATABASE_URL", description="数据库URL")
+    database_url: str = Field("sqlite+aiosqlite:///data/app.db", description="数据库URL")
+    logs_in_memory: bool = Field(False, description="推文日志存放在内存数据库中并定期备份到磁盘")
+    logs_backup_interval: int = Field(30, gt=0, description="内存模式下备份到磁盘的间隔(秒)")
 
     # 日志配置
-    log_level: str = Field("INFO", env="LOG_LEVEL", description="日志级别")
+    log_level: str = Field("INFO", description="日志级别")
 
     # 重试配置
-    max_retry_attempts: int = Field(3, env="MAX_RETRY_ATTEMPTS", description="最大重试次数")
-    retry_delay: int = Field(2, env="RETRY_DELAY", description="重试延迟(秒)")
+    max_retry_attempts: int = Field(3, description="最大重试次数")
+    retry_delay: int = Field(2, description="重试延迟(秒)")
+
+    # 并发配置
+    twikit_concurrency: int = Field(4, ge=1, description="同时进行的Twitter API请求数上限")
 
     # 文件路径
     cookies_file: str = Field("data/cookies.json", description="Cookie文件路径")
     log_file: str = Field("data/app.log", description="日志文件路径")
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False
+    )
 
     def validate_config(self) -> bool:
         """验证配置完整性"""
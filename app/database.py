@@ -1,25 +1,107 @@
 # 异步数据库管理
 import aiosqlite
 import asyncio
+import logging
 import os
+from itertools import groupby
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple, Any
 from .models import TweetLog
 
 
+logger = logging.getLogger(__name__)
+
+# 每个连接打开后执行的PRAGMA: WAL模式下读写互不阻塞, synchronous=NORMAL避免每次提交都fsync
+SQLITE_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=3000;
+"""
+
+# 分块读取查询结果的行数, 减少与aiosqlite线程之间的往返
+FETCH_CHUNK_SIZE = 250
+
+# 单个事务内最多合并的写操作数
+WRITE_BATCH_SIZE = 100
+
+INSERT_TWEET_LOG_SQL = """
+    INSERT INTO tweet_logs (tweet_id, text, status, error_message)
+    VALUES (?, ?, ?, ?)
+"""
+
+# 固定的UPDATE语句: 参数为None的列保持原值, 所有更新共用同一条预编译语句
+UPDATE_TWEET_LOG_SQL = """
+    UPDATE tweet_logs
+    SET tweet_id = COALESCE(?, tweet_id),
+        status = COALESCE(?, status),
+        retry_count = COALESCE(?, retry_count),
+        error_message = COALESCE(?, error_message),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+
+
 class DatabaseManager:
     """异步SQLite数据库管理器"""
 
     def __init__(self, database_path: str = "data/app.db"):
         self.database_path = database_path
-        self._connection = None
+        # 长连接: 一个写连接 + 一个读连接, WAL模式下读操作不会被写入阻塞
+        self._connection: Optional[aiosqlite.Connection] = None
+        self._reader: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+        # 日志写入队列: 后台任务将排队的写操作合并到同一事务中提交
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        # 内存模式: 日志写入内存数据库, 由后台任务定期备份到磁盘
+        self._in_memory = False
+        self._backup_interval = 30.0
+        self._backup_task: Optional[asyncio.Task] = None
 
-    async def init_database(self):
-        """初始化数据库表结构"""
+    async def _open_connection(self, database: Optional[str] = None) -> aiosqlite.Connection:
+        """打开数据库连接并应用PRAGMA调优"""
+        db = await aiosqlite.connect(database or self.database_path)
+        await db.executescript(SQLITE_PRAGMAS)
+        return db
+
+    def _get_writer(self) -> aiosqlite.Connection:
+        """获取写连接"""
+        if self._connection is None:
+            raise RuntimeError("数据库未初始化")
+        return self._connection
+
+    def _get_reader(self) -> aiosqlite.Connection:
+        """获取读连接"""
+        if self._reader is None:
+            raise RuntimeError("数据库未初始化")
+        return self._reader
+
+    async def init_database(self, in_memory: bool = False, backup_interval: float = 30.0):
+        """
+        初始化数据库表结构并建立长连接
+
+        Args:
+            in_memory: 是否使用内存数据库(定期备份到database_path)
+            backup_interval: 内存模式下备份到磁盘的间隔(秒)
+        """
         # 确保数据目录存在
-        os.makedirs(os.path.dirname(self.database_path), exist_ok=True)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(self.database_path), exist_ok=True)
 
-        async with aiosqlite.connect(self.database_path) as db:
+        if self._connection is None:
+            self._in_memory = in_memory
+            self._backup_interval = backup_interval
+
+            if in_memory:
+                self._connection = await self._open_connection(":memory:")
+                await self._restore_from_disk()
+            else:
+                self._connection = await self._open_connection()
+
+        db = self._connection
+        async with self._write_lock:
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS tweet_logs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -33,6 +115,21 @@ class DatabaseManager:
                 )
             """)
 
+            # 覆盖索引: /api/logs的列表查询完全由索引满足, 无需解析表记录
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tweet_logs_cover
+                ON tweet_logs (created_at DESC, id, tweet_id, status, retry_count)
+            """)
+
+            # 已被覆盖索引取代
+            await db.execute("DROP INDEX IF EXISTS idx_tweet_logs_created_at")
+
+            # status供失败重试扫描使用
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tweet_logs_status
+                ON tweet_logs (status)
+            """)
+
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS app_config (
                     key TEXT PRIMARY KEY,
@@ -43,66 +140,220 @@ class DatabaseManager:
 
             await db.commit()
 
-    async def log_tweet(self, text: str, tweet_id: Optional[str] = None,
-                       status: str = "pending", error_message: Optional[str] = None) -> int:
-        """记录推文日志"""
-        async with aiosqlite.connect(self.database_path) as db:
-            cursor = await db.execute("""
-                INSERT INTO tweet_logs (tweet_id, text, status, error_message)
-                VALUES (?, ?, ?, ?)
-            """, (tweet_id, text, status, error_message))
+        if self._reader is None:
+            # 内存数据库无法被其他连接共享, 读写共用同一连接
+            if self._in_memory:
+                self._reader = self._connection
+            else:
+                self._reader = await self._open_connection()
 
-            await db.commit()
-            return cursor.lastrowid
+        if self._writer_task is None:
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer_loop())
 
-    async def update_tweet_log(self, log_id: int, tweet_id: Optional[str] = None,
-                              status: Optional[str] = None, retry_count: Optional[int] = None,
-                              error_message: Optional[str] = None):
-        """更新推文日志"""
-        updates = []
-        params = []
+        if self._in_memory and self._backup_task is None:
+            self._backup_task = asyncio.create_task(self._backup_loop())
+
+    async def _restore_from_disk(self):
+        """内存模式启动时载入磁盘上已有的数据"""
+        if not await asyncio.to_thread(os.path.exists, self.database_path):
+            return
+
+        source = await aiosqlite.connect(self.database_path)
+        try:
+            await source.backup(self._connection)
+        finally:
+            await source.close()
+
+    async def _backup_to_disk(self):
+        """将内存数据库备份到磁盘"""
+        target = await aiosqlite.connect(self.database_path)
+        try:
+            # 持有写锁, 避免备份到未提交的批量写入事务
+            async with self._write_lock:
+                await self._get_writer().backup(target)
+        finally:
+            await target.close()
+
+    async def _backup_loop(self):
+        """后台备份任务: 定期将内存数据库写入磁盘"""
+        while True:
+            await asyncio.sleep(self._backup_interval)
+            try:
+                await self._backup_to_disk()
+            except Exception as e:
+                logger.warning(f"数据库备份失败: {e}")
+
+    async def _writer_loop(self):
+        """后台写入任务: 取出当前排队的所有写操作并批量提交"""
+        while True:
+            op = await self._write_queue.get()
+            if op is None:
+                break
+
+            batch = [op]
+            stopping = False
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    op = self._write_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if op is None:
+                    stopping = True
+                    break
+                batch.append(op)
 
-        if tweet_id is not None:
-            updates.append("tweet_id = ?")
-            params.append(tweet_id)
+            try:
+                await self._flush_writes(batch)
+            except Exception as e:
+                # 保证写入任务持续运行, 否则后续写操作会永远等待
+                logger.error(f"批量写入失败: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
 
-        if status is not None:
-            updates.append("status = ?")
-            params.append(status)
+            if stopping:
+                break
 
-        if retry_count is not None:
-            updates.append("retry_count = ?")
-            params.append(retry_count)
+    async def _flush_writes(self, batch: List[Tuple[str, Any, asyncio.Future]]):
+        """在单个事务中执行一批写操作, 失败时逐条重放以隔离出错的操作"""
+        db = self._get_writer()
+        results = []
 
-        if error_message is not None:
-            updates.append("error_message = ?")
-            params.append(error_message)
+        async with self._write_lock:
+            try:
+                await db.execute("BEGIN")
+                # 连续的UPDATE合并为一次executemany, INSERT需要逐条执行以获取lastrowid
+                for sql, group in groupby(batch, key=lambda op: op[0]):
+                    ops = list(group)
+                    if sql == UPDATE_TWEET_LOG_SQL:
+                        await db.executemany(sql, [params for _, params, _ in ops])
+                        results.extend([None] * len(ops))
+                    else:
+                        for _, params, _ in ops:
+                            cursor = await db.execute(sql, params)
+                            results.append(cursor.lastrowid)
+                await db.commit()
+            except Exception as e:
+                logger.warning(f"批量写入失败，改为逐条写入: {e}")
+                await db.rollback()
+                await self._replay_writes(db, batch)
+                return
 
-        updates.append("updated_at = CURRENT_TIMESTAMP")
-        params.append(log_id)
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
 
-        if updates:
-            query = f"UPDATE tweet_logs SET {', '.join(updates)} WHERE id = ?"
-            async with aiosqlite.connect(self.database_path) as db:
-                await db.execute(query, params)
+    async def _replay_writes(self, db: aiosqlite.Connection,
+                             batch: List[Tuple[str, Any, asyncio.Future]]):
+        """逐条执行并提交写操作, 异常只传给对应的调用方"""
+        for sql, params, future in batch:
+            try:
+                cursor = await db.execute(sql, params)
                 await db.commit()
+            except Exception as e:
+                await db.rollback()
+                if not future.done():
+                    future.set_exception(e)
+                continue
+
+            if not future.done():
+                future.set_result(None if sql == UPDATE_TWEET_LOG_SQL else cursor.lastrowid)
+
+    async def _enqueue_write(self, sql: str, params: Any) -> Any:
+        """将写操作放入队列并等待其所在批次提交"""
+        if self._write_queue is None:
+            raise RuntimeError("数据库未初始化")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((sql, params, future))
+        return await future
+
+    async def close(self):
+        """关闭数据库连接"""
+        # 先让写入任务处理完已排队的操作
+        if self._writer_task is not None:
+            await self._write_queue.put(None)
+            await self._writer_task
+            self._writer_task = None
+            self._write_queue = None
+
+        # 内存模式下关闭前做最后一次备份
+        if self._backup_task is not None:
+            self._backup_task.cancel()
+            try:
+                await self._backup_task
+            except asyncio.CancelledError:
+                pass
+            self._backup_task = None
+            await self._backup_to_disk()
+
+        if self._reader is not None:
+            if self._reader is not self._connection:
+                await self._reader.close()
+            self._reader = None
+
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def log_tweet(self, text: str, tweet_id: Optional[str] = None,
+                       status: str = "pending", error_message: Optional[str] = None) -> int:
+        """记录推文日志"""
+        return await self._enqueue_write(
+            INSERT_TWEET_LOG_SQL,
+            (tweet_id, text, status, error_message)
+        )
+
+    async def update_tweet_log(self, log_id: int, tweet_id: Optional[str] = None,
+                              status: Optional[str] = None, retry_count: Optional[int] = None,
+                              error_message: Optional[str] = None):
+        """更新推文日志"""
+        await self._enqueue_write(
+            UPDATE_TWEET_LOG_SQL,
+            (tweet_id, status, retry_count, error_message, log_id)
+        )
 
     async def get_recent_logs(self, limit: int = 100) -> List[dict]:
         """获取最近的日志记录"""
-        async with aiosqlite.connect(self.database_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute("""
-                SELECT * FROM tweet_logs
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (limit,))
+        db = self._get_reader()
+        cursor = await db.execute("""
+            SELECT id, tweet_id, status, retry_count, created_at
+            FROM tweet_logs
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (limit,))
+
+        columns = [column[0] for column in cursor.description]
+        logs = []
+        while True:
+            rows = await cursor.fetchmany(FETCH_CHUNK_SIZE)
+            if not rows:
+                break
+            logs.extend(dict(zip(columns, row)) for row in rows)
+
+        await cursor.close()
+        return logs
+
+    async def get_log_detail(self, log_id: int) -> Optional[dict]:
+        """获取单条日志的完整记录(包含推文内容和错误信息)"""
+        db = self._get_reader()
+        cursor = await db.execute("""
+            SELECT id, tweet_id, text, status, retry_count, error_message,
+                   created_at, updated_at
+            FROM tweet_logs
+            WHERE id = ?
+        """, (log_id,))
 
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        row = await cursor.fetchone()
+        columns = [column[0] for column in cursor.description]
+        await cursor.close()
+        return dict(zip(columns, row)) if row else None
 
     async def save_config(self, key: str, value: str):
         """保存配置项"""
-        async with aiosqlite.connect(self.database_path) as db:
+        db = self._get_writer()
+        async with self._write_lock:
             await db.execute("""
                 INSERT OR REPLACE INTO app_config (key, value, updated_at)
                 VALUES (?, ?, CURRENT_TIMESTAMP)
@@ -112,13 +363,14 @@ class DatabaseManager:
 
     async def get_config(self, key: str) -> Optional[str]:
         """获取配置项"""
-        async with aiosqlite.connect(self.database_path) as db:
-            cursor = await db.execute("""
-                SELECT value FROM app_config WHERE key = ?
-            """, (key,))
+        db = self._get_reader()
+        cursor = await db.execute("""
+            SELECT value FROM app_config WHERE key = ?
+        """, (key,))
 
-            row = await cursor.fetchone()
-            return row[0] if row else None
+        row = await cursor.fetchone()
+        await cursor.close()
+        return row[0] if row else None
 
 
 # 全局数据库实例
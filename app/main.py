@@ -1,18 +1,20 @@
 # FastAPI主应用
 import asyncio
+import email.message
 import logging
-from datetime import datetime
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
 
 from .config import settings
 from .models import TweetRequest, TweetResponse, ErrorResponse, HealthResponse
 from .twitter_client import TwitterService, TwitterClientError, get_twitter_service, twitter_service
 from .database import db_manager
-from .utils import setup_logging, format_error_response, format_success_response
+from .utils import setup_logging, stop_logging, format_error_response, format_success_response, get_timestamp
 
 # 设置日志
 setup_logging(settings.log_level)
@@ -24,9 +26,24 @@ app = FastAPI(
     description="基于twikit库的Twitter发布服务API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
+# 根路径响应模板，每次请求只替换时间戳
+ROOT_TEMPLATE = {
+    "service": "Twikit HTTP Service",
+    "version": "1.0.0",
+    "status": "running",
+    "docs": "/docs"
+}
+
+# 健康检查失败时的响应模板
+UNHEALTHY_TEMPLATE = {
+    "status": "unhealthy",
+    "twitter_status": "error"
+}
+
 # CORS中间件配置
 app.add_middleware(
     CORSMiddleware,
@@ -48,7 +65,10 @@ async def startup_event():
         logger.info("配置验证通过")
 
         # 初始化数据库
-        await db_manager.init_database()
+        await db_manager.init_database(
+            in_memory=settings.logs_in_memory,
+            backup_interval=settings.logs_backup_interval
+        )
         logger.info("数据库初始化完成")
 
         # 初始化Twitter服务
@@ -57,7 +77,10 @@ async def startup_event():
             username=settings.twitter_username,
             email=settings.twitter_email,
             password=settings.twitter_password,
-            cookies_file=settings.cookies_file
+            cookies_file=settings.cookies_file,
+            concurrency=settings.twikit_concurrency,
+            max_retry_attempts=settings.max_retry_attempts,
+            retry_delay=settings.retry_delay
         )
 
         # 预热Twitter连接
@@ -79,12 +102,19 @@ async def shutdown_event():
     """应用关闭事件"""
     logger.info("正在关闭Twikit HTTP服务...")
 
+    # 关闭数据库连接
+    await db_manager.close()
+    logger.info("数据库连接已关闭")
+
+    # 最后停止日志线程，确保关闭日志全部写出
+    stop_logging()
+
 
 @app.exception_handler(TwitterClientError)
 async def twitter_error_handler(request, exc: TwitterClientError):
     """Twitter客户端异常处理"""
     logger.error(f"Twitter操作异常: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=400,
         content=format_error_response(
             error_code="TWITTER_ERROR",
@@ -98,7 +128,7 @@ async def twitter_error_handler(request, exc: TwitterClientError):
 async def general_exception_handler(request, exc: Exception):
     """通用异常处理"""
     logger.error(f"未处理异常: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content=format_error_response(
             error_code="INTERNAL_ERROR",
@@ -111,32 +141,25 @@ async def general_exception_handler(request, exc: Exception):
 @app.get("/", response_model=dict)
 async def root():
     """根路径"""
-    return {
-        "service": "Twikit HTTP Service",
-        "version": "1.0.0",
-        "status": "running",
-        "timestamp": datetime.now().isoformat(),
-        "docs": "/docs"
-    }
+    return {**ROOT_TEMPLATE, "timestamp": get_timestamp()}
 
 
-@app.get("/health", response_model=HealthResponse)
+@app.get("/health", responses={200: {"model": HealthResponse}})
 async def health_check():
     """健康检查"""
+    # 响应结构固定，直接返回dict，跳过HealthResponse模型的构建和校验
     try:
         # 检查Twitter服务状态
         twitter_status = await get_twitter_service().health_check()
 
-        return HealthResponse(
-            status="healthy",
-            twitter_status=twitter_status["status"]
-        )
+        return {
+            "status": "healthy",
+            "timestamp": get_timestamp(),
+            "twitter_status": twitter_status["status"]
+        }
     except Exception as e:
         logger.error(f"健康检查失败: {e}")
-        return HealthResponse(
-            status="unhealthy",
-            twitter_status="error"
-        )
+        return {**UNHEALTHY_TEMPLATE, "timestamp": get_timestamp()}
 
 
 async def process_tweet_async(tweet_data: TweetRequest, log_id: int):
@@ -174,8 +197,52 @@ async def process_tweet_async(tweet_data: TweetRequest, log_id: int):
         raise
 
 
-@app.post("/api/tweet", response_model=TweetResponse)
-async def create_tweet(tweet_data: TweetRequest, background_tasks: BackgroundTasks):
+def _is_json_content_type(content_type: Optional[str]) -> bool:
+    """判断请求体是否按JSON解析(与FastAPI规则一致: 未声明类型或application/json、application/*+json)"""
+    if not content_type:
+        return True
+
+    message = email.message.Message()
+    message["content-type"] = content_type
+    subtype = message.get_content_subtype()
+    return message.get_content_maintype() == "application" and (subtype == "json" or subtype.endswith("+json"))
+
+
+async def parse_tweet_request(request: Request) -> TweetRequest:
+    """
+    解析推文请求体
+
+    直接将原始请求体交给pydantic-core一次完成JSON解析和字段校验，
+    不构建中间dict，长度不合法的请求在进入Python层处理前即被拒绝
+    """
+    if not _is_json_content_type(request.headers.get("content-type")):
+        raise RequestValidationError([{
+            "type": "model_attributes_type",
+            "loc": ("body",),
+            "msg": "Input should be a valid dictionary or object to extract fields from"
+        }])
+
+    try:
+        return TweetRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        # 与FastAPI自带的请求体校验错误格式保持一致; 不回传输入, 避免原始请求体(可能含大体积媒体或非UTF-8字节)进入响应
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_input=False)]
+        )
+
+
+@app.post(
+    "/api/tweet",
+    response_model=TweetResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": TweetRequest.model_json_schema()}}
+        }
+    }
+)
+async def create_tweet(background_tasks: BackgroundTasks,
+                       tweet_data: TweetRequest = Depends(parse_tweet_request)):
     """
     发布推文API端点
 
@@ -278,13 +345,64 @@ async def get_logs(limit: int = 50):
         )
 
 
+@app.get("/api/logs/{log_id}", response_model=dict)
+async def get_log_detail(log_id: int):
+    """获取单条操作日志详情(包含推文内容和错误信息)"""
+    try:
+        log = await db_manager.get_log_detail(log_id)
+    except Exception as e:
+        logger.error(f"获取日志详情失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=format_error_response(
+                error_code="DATABASE_ERROR",
+                message="日志获取失败",
+                details=str(e)
+            )
+        )
+
+    if log is None:
+        raise HTTPException(
+            status_code=404,
+            detail=format_error_response(
+                error_code="NOT_FOUND",
+                message="日志不存在"
+            )
+        )
+
+    return format_success_response(data={"log": log}, message="日志获取成功")
+
+
 # 运行服务的函数 (用于独立运行)
 if __name__ == "__main__":
     import uvicorn
+
+    # 每个工作进程各自持有数据库连接; 内存数据库无法跨进程共享, 只能单进程运行
+    workers = settings.workers
+    if settings.logs_in_memory and workers > 1:
+        logger.warning("内存日志模式仅支持单个工作进程，已将workers设为1")
+        workers = 1
+
+    # 多进程模式下先在主进程登录一次并保存cookies，避免各工作进程同时执行完整登录
+    if workers > 1:
+        try:
+            asyncio.run(TwitterService(
+                username=settings.twitter_username,
+                email=settings.twitter_email,
+                password=settings.twitter_password,
+                cookies_file=settings.cookies_file
+            ).authenticate())
+            logger.info("主进程cookies预热成功")
+        except Exception as e:
+            logger.warning(f"主进程cookies预热失败，各工作进程将自行登录: {e}")
+
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
         reload=False,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
         log_level=settings.log_level.lower()
     )
\ No newline at end of file
@@ -1,6 +1,6 @@
 # 使用Pydantic定义请求和响应数据模型
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
@@ -13,6 +13,8 @@ class TweetRequest(BaseModel):
 
 class TweetResponse(BaseModel):
     """推文发布响应模型"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     success: bool = Field(..., description="操作是否成功")
     tweet_id: Optional[str] = Field(None, description="发布的推文ID")
     message: str = Field(..., description="响应消息")
@@ -21,6 +23,8 @@ class TweetResponse(BaseModel):
 
 class ErrorResponse(BaseModel):
     """错误响应模型"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     success: bool = Field(False, description="操作失败")
     error_code: str = Field(..., description="错误代码")
     message: str = Field(..., description="错误消息")
@@ -41,6 +45,8 @@ class TweetLog(BaseModel):
 
 class HealthResponse(BaseModel):
     """健康检查响应"""
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     status: str = Field("healthy", description="服务状态")
     timestamp: datetime = Field(default_factory=datetime.now, description="检查时间")
     twitter_status: str = Field(..., description="Twitter连接状态")
\ No newline at end of file
@@ -3,28 +3,50 @@ import asyncio
 import base64
 import logging
 import os
-from typing import Optional, List, Dict, Any
+import re
+import tempfile
+import time
+from typing import Optional, List, Dict, Any, Union
 from twikit import Client
-from tenacity import retry, stop_after_attempt, wait_exponential, RetryError
 from .database import db_manager
 
 
 logger = logging.getLogger(__name__)
 
+# 媒体数据: base64字符串(可带data URI头)或已解码的原始字节
+MediaData = Union[str, bytes, bytearray, memoryview]
+
+# 认证相关错误关键字
+_AUTH_ERROR_RE = re.compile(r"auth|login|unauthorized|forbidden", re.IGNORECASE)
+
 
 class TwitterClientError(Exception):
     """Twitter客户端异常"""
     pass
 
 
+def _decode_media(media_data: str) -> bytes:
+    """解析并解码base64媒体数据"""
+    if media_data.startswith('data:'):
+        # 格式: data:image/jpeg;base64,/9j/4AAQ...
+        _, data = media_data.split(',', 1)
+    else:
+        data = media_data
+
+    return base64.b64decode(data)
+
+
 class TwitterService:
     """Twitter服务封装类"""
 
-    def __init__(self, username: str, email: str, password: str, cookies_file: str = "data/cookies.json"):
+    def __init__(self, username: str, email: str, password: str, cookies_file: str = "data/cookies.json",
+                 concurrency: int = 4, max_retry_attempts: int = 3, retry_delay: float = 2):
         self.username = username
         self.email = email
         self.password = password
         self.cookies_file = cookies_file
+        self.max_retry_attempts = max_retry_attempts
+        self.retry_delay = retry_delay
 
         # 创建带有更真实浏览器头的Client
         self.client = Client(
@@ -34,13 +56,30 @@ class TwitterService:
         )
         self._authenticated = False
 
+        # 认证检查结果缓存，TTL内不重复请求Twitter
+        self._auth_checked_at = float("-inf")
+        self._auth_ttl = 60.0
+
+        # 限制同时进行的Twitter API请求数，避免并发推文互相争抢twikit客户端
+        self._request_semaphore = asyncio.Semaphore(concurrency)
+        # 同一时间只执行一个登录流程
+        self._login_lock = asyncio.Lock()
+
     async def authenticate(self) -> bool:
         """认证登录Twitter账号"""
+        async with self._login_lock:
+            # 等待锁期间其他请求已完成登录，无需重复登录
+            if self._authenticated:
+                return True
+            return await self._login()
+
+    async def _login(self) -> bool:
+        """加载cookies或执行完整登录(调用方需持有登录锁)"""
         try:
-            # 尝试加载已保存的cookies
-            if os.path.exists(self.cookies_file):
+            # 尝试加载已保存的cookies (文件操作放到线程中执行，避免阻塞事件循环)
+            if await asyncio.to_thread(os.path.exists, self.cookies_file):
                 logger.info("尝试加载已保存的cookies")
-                self.client.load_cookies(self.cookies_file)
+                await asyncio.to_thread(self.client.load_cookies, self.cookies_file)
 
                 # 验证cookies是否有效
                 try:
@@ -58,15 +97,18 @@ class TwitterService:
             # 添加延迟避免速率限制
             await asyncio.sleep(2)
 
-            await self.client.login(
-                auth_info_1=self.username,
-                auth_info_2=self.email,
-                password=self.password
-            )
+            async with self._request_semaphore:
+                await self.client.login(
+                    auth_info_1=self.username,
+                    auth_info_2=self.email,
+                    password=self.password
+                )
 
             # 保存cookies到文件
-            os.makedirs(os.path.dirname(self.cookies_file), exist_ok=True)
-            self.client.save_cookies(self.cookies_file)
+            cookies_dir = os.path.dirname(self.cookies_file)
+            if cookies_dir:
+                await asyncio.to_thread(os.makedirs, cookies_dir, exist_ok=True)
+            await asyncio.to_thread(self._save_cookies)
 
             self._authenticated = True
             logger.info("Twitter账号认证成功，cookies已保存")
@@ -85,31 +127,61 @@ class TwitterService:
 
             raise TwitterClientError(f"认证失败: {str(e)}")
 
+    def _save_cookies(self):
+        """原子地保存cookies: 先写临时文件再替换，避免其他进程读到写了一半的文件"""
+        cookies_dir = os.path.dirname(self.cookies_file) or "."
+        fd, temp_path = tempfile.mkstemp(dir=cookies_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            self.client.save_cookies(temp_path)
+            os.replace(temp_path, self.cookies_file)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
     async def _test_authentication(self):
         """测试认证状态"""
+        now = time.monotonic()
+        if self._authenticated and now - self._auth_checked_at < self._auth_ttl:
+            return
+
         # 通过获取账号信息验证认证状态
-        user = await self.client.get_user_by_screen_name(self.username)
+        async with self._request_semaphore:
+            user = await self.client.get_user_by_screen_name(self.username)
         if not user:
             raise TwitterClientError("认证测试失败")
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        reraise=True
-    )
-    async def create_tweet(self, text: str, media_data: Optional[List[str]] = None,
+        self._auth_checked_at = now
+
+    async def create_tweet(self, text: str, media_data: Optional[List[MediaData]] = None,
                           reply_to: Optional[str] = None) -> Dict[str, Any]:
         """
-        发布推文
+        发布推文(失败时按指数退避重试)
 
         Args:
             text: 推文文本
-            media_data: 媒体数据列表(base64编码)
+            media_data: 媒体数据列表(base64编码或原始字节)
             reply_to: 回复的推文ID
 
         Returns:
             包含tweet_id等信息的字典
         """
+        attempts = max(1, self.max_retry_attempts)
+        for attempt in range(attempts):
+            try:
+                return await self._create_tweet_impl(text, media_data, reply_to)
+            except Exception:
+                if attempt == attempts - 1:
+                    raise
+
+                delay = min(10, self.retry_delay * 2 ** attempt)
+                logger.warning(f"推文发布失败，{delay}秒后进行第{attempt + 2}次尝试")
+                await asyncio.sleep(delay)
+
+    async def _create_tweet_impl(self, text: str, media_data: Optional[List[MediaData]],
+                                 reply_to: Optional[str]) -> Dict[str, Any]:
+        """发布推文(单次尝试)"""
         if not self._authenticated:
             await self.authenticate()
 
@@ -122,19 +194,20 @@ class TwitterService:
             # 发布推文
             logger.info(f"发布推文: {text[:50]}...")
 
-            if reply_to:
-                # 回复推文
-                tweet = await self.client.create_tweet(
-                    text=text,
-                    media_ids=media_ids if media_ids else None,
-                    reply_to=reply_to
-                )
-            else:
-                # 普通推文
-                tweet = await self.client.create_tweet(
-                    text=text,
-                    media_ids=media_ids if media_ids else None
-                )
+            async with self._request_semaphore:
+                if reply_to:
+                    # 回复推文
+                    tweet = await self.client.create_tweet(
+                        text=text,
+                        media_ids=media_ids if media_ids else None,
+                        reply_to=reply_to
+                    )
+                else:
+                    # 普通推文
+                    tweet = await self.client.create_tweet(
+                        text=text,
+                        media_ids=media_ids if media_ids else None
+                    )
 
             result = {
                 "tweet_id": tweet.id,
@@ -152,60 +225,54 @@ class TwitterService:
             logger.error(error_msg)
 
             # 如果是认证相关错误，重置认证状态
-            if any(keyword in str(e).lower() for keyword in ['auth', 'login', 'unauthorized', 'forbidden']):
+            if _AUTH_ERROR_RE.search(str(e)):
                 self._authenticated = False
+                self._auth_checked_at = float("-inf")
                 logger.warning("检测到认证错误，已重置认证状态")
 
             raise TwitterClientError(error_msg)
 
-    async def _upload_media(self, media_data_list: List[str]) -> List[str]:
+    async def _upload_media(self, media_data_list: List[MediaData]) -> List[str]:
         """
         上传媒体文件
 
         Args:
-            media_data_list: base64编码的媒体数据列表
+            media_data_list: 媒体数据列表(base64编码或原始字节)
 
         Returns:
             媒体ID列表
         """
-        media_ids = []
-
-        for i, media_data in enumerate(media_data_list):
-            try:
-                # 解析base64数据
-                if media_data.startswith('data:'):
-                    # 格式: data:image/jpeg;base64,/9j/4AAQ...
-                    header, data = media_data.split(',', 1)
-                    mime_type = header.split(';')[0].split(':')[1]
-                else:
-                    data = media_data
-                    mime_type = "image/jpeg"  # 默认类型
-
-                # 解码base64
-                media_bytes = base64.b64decode(data)
-
-                # 保存临时文件
-                temp_filename = f"temp_media_{i}.jpg"
-                with open(temp_filename, 'wb') as f:
-                    f.write(media_bytes)
-
-                # 上传到Twitter
-                media_id = await self.client.upload_media(temp_filename)
-                media_ids.append(media_id)
-
-                # 删除临时文件
-                os.unlink(temp_filename)
+        # 多个媒体文件并发上传, 任一失败时取消其余上传, 返回顺序与输入一致
+        try:
+            async with asyncio.TaskGroup() as group:
+                tasks = [
+                    group.create_task(self._upload_single_media(i, media_data))
+                    for i, media_data in enumerate(media_data_list)
+                ]
+        except ExceptionGroup as eg:
+            raise eg.exceptions[0]
+
+        return [task.result() for task in tasks]
+
+    async def _upload_single_media(self, index: int, media_data: MediaData) -> str:
+        """解码并上传单个媒体文件"""
+        try:
+            # 内部调用方直接传入原始字节时跳过base64解码
+            if isinstance(media_data, (bytes, bytearray, memoryview)):
+                media_bytes = bytes(media_data)
+            else:
+                media_bytes = await asyncio.to_thread(_decode_media, media_data)
 
-                logger.info(f"媒体上传成功: {media_id}")
+            # 直接上传内存中的字节数据，无需写入临时文件
+            async with self._request_semaphore:
+                media_id = await self.client.upload_media(media_bytes)
 
-            except Exception as e:
-                logger.error(f"媒体上传失败 ({i}): {e}")
-                # 清理可能的临时文件
-                if os.path.exists(f"temp_media_{i}.jpg"):
-                    os.unlink(f"temp_media_{i}.jpg")
-                raise TwitterClientError(f"媒体上传失败: {str(e)}")
+            logger.info(f"媒体上传成功: {media_id}")
+            return media_id
 
-        return media_ids
+        except Exception as e:
+            logger.error(f"媒体上传失败 ({index}): {e}")
+            raise TwitterClientError(f"媒体上传失败: {str(e)}")
 
     async def get_tweet_info(self, tweet_id: str) -> Optional[Dict[str, Any]]:
         """获取推文信息"""
@@ -213,7 +280,8 @@ class TwitterService:
             await self.authenticate()
 
         try:
-            tweet = await self.client.get_tweet_by_id(tweet_id)
+            async with self._request_semaphore:
+                tweet = await self.client.get_tweet_by_id(tweet_id)
             return {
                 "id": tweet.id,
                 "text": tweet.text,
@@ -1,19 +1,68 @@
 # 工具函数
 import logging
+import logging.handlers
+import queue
 import sys
+import time
 from datetime import datetime
 
 
+# 响应时间戳缓存: [生成时间, ISO格式字符串]
+_TIMESTAMP_REFRESH_INTERVAL = 0.25
+_last_timestamp = [0.0, ""]
+
+# 日志后台监听器: 在独立线程中执行实际的日志输出; 根日志器上对应的队列处理器
+_log_listener = None
+_queue_handler = None
+
+
 def setup_logging(log_level: str = "INFO"):
     """设置日志配置"""
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler('data/app.log', encoding='utf-8')
-        ]
-    )
+    global _log_listener, _queue_handler
+    if _log_listener is not None:
+        return
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [
+        logging.StreamHandler(sys.stdout),
+        logging.FileHandler('data/app.log', encoding='utf-8')
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # 事件循环中只把日志记录放入队列，写文件/输出由监听线程完成
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, log_level.upper()))
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _log_listener.start()
+
+
+def stop_logging():
+    """停止日志监听线程，输出队列中剩余的日志"""
+    global _log_listener, _queue_handler
+    if _log_listener is None:
+        return
+
+    # 先移除队列处理器，避免之后的日志写入无人消费的队列
+    logging.getLogger().removeHandler(_queue_handler)
+    _queue_handler = None
+
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    _log_listener = None
+
+
+def get_timestamp() -> str:
+    """获取当前时间的ISO格式字符串(按0.25秒粒度缓存)"""
+    now = time.time()
+    if now - _last_timestamp[0] > _TIMESTAMP_REFRESH_INTERVAL:
+        _last_timestamp[:] = [now, datetime.fromtimestamp(now).isoformat()]
+    return _last_timestamp[1]
 
 
 def format_error_response(error_code: str, message: str, details: str = None) -> dict:
@@ -23,7 +72,7 @@ def format_error_response(error_code: str, message: str, details: str = None) ->
         "error_code": error_code,
         "message": message,
         "details": details,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": get_timestamp()
     }
 
 
@@ -33,5 +82,5 @@ def format_success_response(data: dict, message: str = "操作成功") -> dict:
         "success": True,
         "message": message,
         "data": data,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": get_timestamp()
     }
\ No newline at end of file
@@ -60,6 +60,47 @@ async def test_tweet_endpoint_validation(test_client):
     # 注意: 这里可能会失败，因为需要真实的Twitter凭据
 
 
+@pytest.mark.asyncio
+async def test_tweet_endpoint_invalid_body(test_client):
+    """测试推文端点对非法请求体的处理"""
+    # 长度校验错误位置以body为前缀，且不回传输入内容
+    response = await test_client.post("/api/tweet", json={"text": ""})
+    assert response.status_code == 422
+    error = response.json()["detail"][0]
+    assert error["loc"] == ["body", "text"]
+    assert "input" not in error
+
+    # 非法JSON
+    response = await test_client.post(
+        "/api/tweet",
+        content=b'{"text": ',
+        headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 422
+    error = response.json()["detail"][0]
+    assert error["type"] == "json_invalid"
+    assert error["loc"] == ["body"]
+    assert "input" not in error
+
+    # 非UTF-8字节
+    response = await test_client.post(
+        "/api/tweet",
+        content=b'{"text": "\xff\xfe"}',
+        headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][0] == "body"
+
+    # 非JSON内容类型
+    response = await test_client.post(
+        "/api/tweet",
+        content='{"text": "测试推文"}'.encode(),
+        headers={"Content-Type": "text/plain"}
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body"]
+
+
 @pytest.mark.asyncio
 async def test_logs_endpoint(test_client):
     """测试日志端点"""
@@ -0,0 +1,170 @@
+# 数据库管理器测试
+import pytest
+import pytest_asyncio
+import asyncio
+import sqlite3
+from unittest.mock import patch
+
+from app.database import DatabaseManager
+
+
+@pytest_asyncio.fixture
+async def db_manager(tmp_path):
+    """创建使用临时数据库的管理器"""
+    manager = DatabaseManager(str(tmp_path / "app.db"))
+    await manager.init_database()
+    yield manager
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_log_tweet_unique_ids(db_manager):
+    """测试并发记录日志返回唯一的ID"""
+    log_ids = await asyncio.gather(*[
+        db_manager.log_tweet(text=f"推文{i}", status="processing") for i in range(50)
+    ])
+
+    assert len(set(log_ids)) == 50
+    for i, log_id in enumerate(log_ids):
+        log = await db_manager.get_log_detail(log_id)
+        assert log["text"] == f"推文{i}"
+
+
+@pytest.mark.asyncio
+async def test_mixed_inserts_and_updates_in_batch(db_manager):
+    """测试同一批次中插入和更新混合执行"""
+    first_id = await db_manager.log_tweet(text="第一条", status="processing")
+    second_id = await db_manager.log_tweet(text="第二条", status="processing")
+
+    results = await asyncio.gather(
+        db_manager.update_tweet_log(first_id, tweet_id="111", status="success"),
+        db_manager.update_tweet_log(second_id, status="failed", error_message="出错"),
+        db_manager.log_tweet(text="第三条", status="processing"),
+        db_manager.update_tweet_log(second_id, retry_count=1),
+        db_manager.log_tweet(text="第四条", status="processing"),
+    )
+
+    third_id, fourth_id = results[2], results[4]
+    assert third_id != fourth_id
+
+    first = await db_manager.get_log_detail(first_id)
+    assert first["tweet_id"] == "111"
+    assert first["status"] == "success"
+
+    second = await db_manager.get_log_detail(second_id)
+    assert second["status"] == "failed"
+    assert second["error_message"] == "出错"
+    assert second["retry_count"] == 1
+
+    assert (await db_manager.get_log_detail(third_id))["text"] == "第三条"
+    assert (await db_manager.get_log_detail(fourth_id))["text"] == "第四条"
+
+
+@pytest.mark.asyncio
+async def test_failing_write_does_not_affect_batch(db_manager):
+    """测试批次中单条写入失败不影响其他写入"""
+    results = await asyncio.gather(
+        db_manager.log_tweet(text="ok1"),
+        db_manager.log_tweet(text=None),  # 违反NOT NULL约束
+        db_manager.log_tweet(text="ok2"),
+        return_exceptions=True
+    )
+
+    assert isinstance(results[0], int)
+    assert isinstance(results[1], sqlite3.IntegrityError)
+    assert isinstance(results[2], int)
+
+    assert (await db_manager.get_log_detail(results[0]))["text"] == "ok1"
+    assert (await db_manager.get_log_detail(results[2]))["text"] == "ok2"
+
+
+@pytest.mark.asyncio
+async def test_writer_survives_flush_error(db_manager):
+    """测试批量写入异常后写入任务继续运行"""
+    original_flush = db_manager._flush_writes
+    calls = []
+
+    async def flaky_flush(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError("flush failed")
+        await original_flush(batch)
+
+    with patch.object(db_manager, '_flush_writes', side_effect=flaky_flush):
+        with pytest.raises(RuntimeError):
+            await db_manager.log_tweet(text="失败")
+
+        log_id = await asyncio.wait_for(db_manager.log_tweet(text="成功"), timeout=5)
+
+    assert (await db_manager.get_log_detail(log_id))["text"] == "成功"
+
+
+@pytest.mark.asyncio
+async def test_close_drains_pending_writes(tmp_path):
+    """测试关闭时处理完已排队的写入"""
+    database_path = str(tmp_path / "app.db")
+    manager = DatabaseManager(database_path)
+    await manager.init_database()
+
+    tasks = [asyncio.create_task(manager.log_tweet(text=f"推文{i}")) for i in range(20)]
+    await asyncio.sleep(0)
+    await manager.close()
+
+    assert all(task.done() and isinstance(task.result(), int) for task in tasks)
+
+    reopened = DatabaseManager(database_path)
+    await reopened.init_database()
+    logs = await reopened.get_recent_logs(limit=100)
+    await reopened.close()
+
+    assert len(logs) == 20
+
+
+@pytest.mark.asyncio
+async def test_in_memory_round_trip(tmp_path):
+    """测试内存模式载入、写入、备份后重新打开数据一致"""
+    database_path = str(tmp_path / "app.db")
+
+    manager = DatabaseManager(database_path)
+    await manager.init_database(in_memory=True, backup_interval=0.05)
+    first_id = await manager.log_tweet(text="第一次")
+    await manager.close()
+
+    manager = DatabaseManager(database_path)
+    await manager.init_database(in_memory=True, backup_interval=0.05)
+    assert (await manager.get_log_detail(first_id))["text"] == "第一次"
+    second_id = await manager.log_tweet(text="第二次")
+    await manager.close()
+
+    # 磁盘上的数据库包含两次写入
+    manager = DatabaseManager(database_path)
+    await manager.init_database()
+    logs = await manager.get_recent_logs()
+    await manager.close()
+
+    assert {log["id"] for log in logs} == {first_id, second_id}
+
+
+@pytest.mark.asyncio
+async def test_backup_loop_survives_failure(tmp_path):
+    """测试备份失败后备份任务继续运行"""
+    manager = DatabaseManager(str(tmp_path / "app.db"))
+    calls = []
+
+    async def flaky_backup():
+        calls.append(None)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("disk I/O error")
+
+    with patch.object(manager, '_backup_to_disk', side_effect=flaky_backup):
+        await manager.init_database(in_memory=True, backup_interval=0.01)
+        await asyncio.sleep(0.2)
+
+        assert len(calls) >= 2
+        assert not manager._backup_task.done()
+
+    await manager.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -8,13 +8,13 @@ from app.twitter_client import TwitterService, TwitterClientError
 
 
 @pytest.fixture
-def twitter_service():
+def twitter_service(tmp_path):
     """创建测试用的Twitter服务实例"""
     return TwitterService(
         username="test_user",
         email="test@example.com",
         password="test_password",
-        cookies_file="test_cookies.json"
+        cookies_file=str(tmp_path / "test_cookies.json")
     )
 
 
@@ -33,6 +33,35 @@ async def test_authentication_success(twitter_service):
         mock_save.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_concurrent_authentication_logs_in_once(twitter_service):
+    """测试并发认证只执行一次登录"""
+    with patch.object(twitter_service.client, 'login', new_callable=AsyncMock) as mock_login, \
+         patch.object(twitter_service.client, 'save_cookies'), \
+         patch('app.twitter_client.asyncio.sleep', new_callable=AsyncMock):
+
+        results = await asyncio.gather(*[twitter_service.authenticate() for _ in range(5)])
+
+        assert results == [True] * 5
+        mock_login.assert_called_once()
+
+
+def test_save_cookies_atomic(twitter_service):
+    """测试cookies通过临时文件原子替换写入"""
+    def fake_save(path):
+        assert path != twitter_service.cookies_file
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"auth_token": "token"}')
+
+    with patch.object(twitter_service.client, 'save_cookies', side_effect=fake_save):
+        twitter_service._save_cookies()
+
+    cookies_dir = os.path.dirname(twitter_service.cookies_file)
+    assert os.listdir(cookies_dir) == ["test_cookies.json"]
+    with open(twitter_service.cookies_file, encoding='utf-8') as f:
+        assert f.read() == '{"auth_token": "token"}'
+
+
 @pytest.mark.asyncio
 async def test_authentication_failure(twitter_service):
     """测试认证失败"""
@@ -62,6 +91,24 @@ async def test_create_tweet_success(twitter_service):
         mock_create.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_create_tweet_retry(twitter_service):
+    """测试推文发布失败后重试"""
+    mock_tweet = MagicMock()
+    mock_tweet.id = "123456789"
+
+    with patch.object(twitter_service.client, 'create_tweet', new_callable=AsyncMock,
+                      side_effect=[Exception("Network error"), mock_tweet]) as mock_create, \
+         patch('app.twitter_client.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+
+        twitter_service._authenticated = True
+        result = await twitter_service.create_tweet("测试推文")
+
+        assert result["tweet_id"] == "123456789"
+        assert mock_create.call_count == 2
+        mock_sleep.assert_called_once_with(2)
+
+
 @pytest.mark.asyncio
 async def test_create_tweet_with_media(twitter_service):
     """测试带媒体的推文发布"""
@@ -100,6 +147,63 @@ async def test_health_check(twitter_service):
         assert "Twitter API连接正常" in result["message"]
 
 
+@pytest.mark.asyncio
+async def test_upload_media_raw_bytes(twitter_service):
+    """测试原始字节媒体数据跳过base64解码"""
+    uploaded = []
+
+    async def fake_upload(source):
+        uploaded.append(source)
+        return f"media{len(uploaded)}"
+
+    with patch.object(twitter_service.client, 'upload_media', side_effect=fake_upload), \
+         patch('app.twitter_client.base64.b64decode') as mock_decode:
+
+        media_ids = await twitter_service._upload_media([b"raw image data"])
+
+        assert media_ids == ["media1"]
+        assert uploaded == [b"raw image data"]
+        mock_decode.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_upload_media_failure_cancels_others(twitter_service):
+    """测试单个媒体上传失败时取消其余上传"""
+    cancelled = []
+
+    async def fake_upload(source):
+        if source == b"bad":
+            raise Exception("upload failed")
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(source)
+            raise
+
+    with patch.object(twitter_service.client, 'upload_media', side_effect=fake_upload):
+        with pytest.raises(TwitterClientError):
+            await twitter_service._upload_media([b"good1", b"bad", b"good2"])
+
+    assert sorted(cancelled) == [b"good1", b"good2"]
+
+
+@pytest.mark.asyncio
+async def test_authentication_check_cached(twitter_service):
+    """测试认证检查结果在TTL内被缓存"""
+    with patch.object(twitter_service.client, 'get_user_by_screen_name',
+                      new_callable=AsyncMock, return_value=MagicMock()) as mock_get_user:
+
+        twitter_service._authenticated = True
+        await twitter_service._test_authentication()
+        await twitter_service._test_authentication()
+        assert mock_get_user.call_count == 1
+
+        # 缓存过期后重新检查
+        twitter_service._auth_checked_at = float("-inf")
+        await twitter_service._test_authentication()
+        assert mock_get_user.call_count == 2
+
+
 def test_media_upload_base64_parsing():
     """测试base64媒体数据解析"""
     # 这是一个简单的单元测试，不需要实际的Twitter连接